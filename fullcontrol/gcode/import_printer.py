@@ -1,21 +1,27 @@
 
 import json
 import os
+import re
 from copy import deepcopy
+from functools import lru_cache
 from fullcontrol.gcode import Extruder, ManualGcode, Buildplate, Hotend, Fan
 import fullcontrol.devices.community.singletool.base_settings as base_settings
 from importlib import import_module, resources
 
+# terms in start/end gcode strings that should be replaced with values, e.g. {nozzle_temp}
+BRACKET_TERMS = re.compile(r'\{(.*?)\}', re.ASCII)
 
+
+@lru_cache(maxsize=None)
 def load_json(library, file_name):
+    ' printer library files are static package data, so each file is only read and parsed once per session (callers must not modify the returned data)'
     resource = resources.files('fullcontrol') / 'devices' / library / file_name
     with resource.open('r') as file:
         return json.load(file)
 
 def find_terms_in_brackets(input_string):
-    import re
     ' find all terms in the start_gcode string contained within {} and split the terms if they are comma separated'
-    matches = re.findall(r'\{(.*?)\}', input_string)
+    matches = BRACKET_TERMS.findall(input_string)
     split_matches = [item.split(',') for item in matches]
     cleaned_matches = [[item.strip() for item in sublist]
                        for sublist in split_matches]
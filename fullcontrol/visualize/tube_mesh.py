@@ -67,19 +67,26 @@ class MeshExporter:
                     write_data(out, body.mesh_normals,
                                body.triangle_points.reshape(-1,9), identifier)
 
-    @staticmethod
-    def _write_ascii_stl_data(out, mesh_normals, triangle_points, solid_name: str = 'object'):
+    _ASCII_FACET = '\n'.join((
+        'facet normal %e %e %e',
+        '    outer loop',
+        '        vertex %e %e %e',
+        '        vertex %e %e %e',
+        '        vertex %e %e %e',
+        '    endloop',
+        'endfacet\n',
+    ))
+    _ASCII_FACETS_PER_WRITE = 4096
+
+    @classmethod
+    def _write_ascii_stl_data(cls, out, mesh_normals, triangle_points, solid_name: str = 'object'):
         print(f'solid {solid_name} # Generated by FullControlXYZ', file=out)
-        for n, vs in zip(mesh_normals, triangle_points):
-            print(
-                f'facet normal {n[0]:e} {n[1]:e} {n[2]:e}',
-                 '    outer loop',
-                f'        vertex {vs[0]:e} {vs[1]:e} {vs[2]:e}',
-                f'        vertex {vs[3]:e} {vs[4]:e} {vs[5]:e}',
-                f'        vertex {vs[6]:e} {vs[7]:e} {vs[8]:e}',
-                 '    endloop',
-                 'endfacet',
-                sep='\n', file=out)
+        # one row of [normal, vertex1, vertex2, vertex3] per facet, formatted a block
+        #  of facets at a time rather than with a Python-level loop per triangle
+        facet_data = np.hstack((mesh_normals, triangle_points))
+        for start in range(0, len(facet_data), cls._ASCII_FACETS_PER_WRITE):
+            block = facet_data[start:start+cls._ASCII_FACETS_PER_WRITE]
+            out.write((cls._ASCII_FACET * len(block)) % tuple(block.ravel().tolist()))
         print(f'endsolid {solid_name}', file=out)
 
     def _write_binary_stl_header(self, out):
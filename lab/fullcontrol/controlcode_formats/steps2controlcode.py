@@ -1,11 +1,17 @@
-import os
-import shutil
+import hashlib
 import zipfile
 from importlib import resources
 from lab.fullcontrol.controlcode_formats.controls import CodeControls
 from fullcontrol import GcodeControls
 
 
+def encoded_chunks(texts: tuple, chunk_size: int = 2**20):
+    '''Yield the utf-8 encoding of each string in texts, in chunks of up to chunk_size characters'''
+    for text in texts:
+        for i in range(0, len(text), chunk_size):
+            yield text[i:i+chunk_size].encode("utf-8")
+
+
 def gcode_to_bambu_3mf(gcode: str, new_3mf_file: str):
     '''Convert gcode to bambu 3mf'''
     try: import google.colab; colab = True
@@ -13,58 +19,49 @@ def gcode_to_bambu_3mf(gcode: str, new_3mf_file: str):
 
 
     # Paths
-    new_3mf_file = new_3mf_file[:-5] if new_3mf_file.endswith('.3mf') else new_3mf_file
-    local_3mf = "/content/FC_bambulab_template.3mf" if colab else "FC_bambulab_template.3mf"
-    extract_dir = "/content/extracted_3mf" if colab else "extracted_3mf"
+    new_3mf_file = new_3mf_file[:-4] if new_3mf_file.endswith('.3mf') else new_3mf_file
     new_3mf_file = f"/content/{new_3mf_file}.3mf" if colab else f"{new_3mf_file}.3mf"
+    plate_gcode_file = "Metadata/plate_1.gcode"
+    placeholder = "; [FULLCONTROL GCODE HERE]"
 
 
-    # Step 0: Get the .3mf file from the installed Python package using importlib.resources
-    with resources.files('lab.fullcontrol.controlcode_formats') / 'FC_bambulab_template.3mf' as package_3mf_path:
-        # Copy the .3mf file to the local content directory
-        if not os.path.exists(local_3mf):
-            shutil.copy(package_3mf_path, local_3mf)
-
-    # Step 1: Delete existing extracted folder and new .3mf if they exist
-    if os.path.exists(extract_dir):
-        shutil.rmtree(extract_dir)
-    if os.path.exists(new_3mf_file):
-        os.remove(new_3mf_file)
-
-    # Step 2: Extract .3mf
-    os.makedirs(extract_dir, exist_ok=True)
-    with zipfile.ZipFile(local_3mf, 'r') as zip_ref:
-        zip_ref.extractall(extract_dir)
-
-    plate_gcode_file = os.path.join(extract_dir, "Metadata", "plate_1.gcode")
-    placeholder = "; [FULLCONTROL GCODE HERE]"
-    with open(plate_gcode_file, "r", encoding="utf-8") as f:
-        content = f.read()
-    new_content = content.replace(placeholder, gcode)
-    with open(plate_gcode_file, "w", encoding="utf-8") as f:
-        f.write(new_content)
-
-    # Step 4: Repackage contents of FC_bambulab_template into a new .3mf
-    fc_template_dir = os.path.join(extract_dir)
-    with zipfile.ZipFile(new_3mf_file, 'w', zipfile.ZIP_DEFLATED) as new_zip:
-        for foldername, subfolders, filenames in os.walk(fc_template_dir):
-            for filename in filenames:
-                file_path = os.path.join(foldername, filename)
-                # Flatten the structure by ignoring FC_bambulab_template
-                arcname = os.path.relpath(file_path, fc_template_dir)
-                new_zip.write(file_path, arcname)
-
-    # Step 5: Download the new .3mf
+    # Step 1: Open the template .3mf directly from the installed Python package using importlib.resources
+    template_3mf = resources.files('lab.fullcontrol.controlcode_formats') / 'FC_bambulab_template.3mf'
+    with template_3mf.open('rb') as template_file, zipfile.ZipFile(template_file, 'r') as template_zip:
+
+        # Step 2: Split the template gcode either side of the placeholder for the design's gcode
+        template_start, template_end = template_zip.read(plate_gcode_file).decode("utf-8").split(placeholder, 1)
+        md5_item = template_zip.getinfo(plate_gcode_file + ".md5")
+
+        # Step 3: Write the new .3mf in a single pass, copying all other template files unchanged
+        with zipfile.ZipFile(new_3mf_file, 'w', zipfile.ZIP_DEFLATED) as new_zip:
+            for item in template_zip.infolist():
+                if item.is_dir() or item.filename == md5_item.filename:
+                    continue  # the md5 checksum is written once the new gcode has been written
+                new_item = zipfile.ZipInfo(item.filename, date_time=item.date_time)
+                # png thumbnails are already compressed, so they are stored rather than deflated again
+                new_item.compress_type = zipfile.ZIP_STORED if item.filename.endswith('.png') else item.compress_type
+                if item.filename == plate_gcode_file:
+                    # stream the gcode into the 3mf, calculating the md5 from exactly the bytes written
+                    gcode_texts = (template_start, gcode, template_end)
+                    # upper bound of the utf-8 size (4 bytes per character) so zipfile switches to zip64 for huge gcode
+                    new_item.file_size = 4 * sum(map(len, gcode_texts))
+                    md5 = hashlib.md5(usedforsecurity=False)
+                    with new_zip.open(new_item, 'w') as gcode_file:
+                        for chunk in encoded_chunks(gcode_texts):
+                            md5.update(chunk)
+                            gcode_file.write(chunk)
+                    new_md5_item = zipfile.ZipInfo(md5_item.filename, date_time=md5_item.date_time)
+                    new_md5_item.compress_type = md5_item.compress_type
+                    new_zip.writestr(new_md5_item, md5.hexdigest().upper().encode("utf-8"))
+                else:
+                    new_zip.writestr(new_item, template_zip.read(item))
+
+    # Step 4: Download the new .3mf
     if colab: 
         from google.colab import files
         files.download(new_3mf_file)
 
-    # Step 6: Cleanup
-    if os.path.exists(extract_dir):
-        shutil.rmtree(extract_dir)
-    if os.path.exists(local_3mf):
-        os.remove(local_3mf)
-
 def controlcode(steps: list, model_controls: CodeControls, show_tips: bool):
 
     if model_controls.code_format != '3mf':
@@ -82,7 +79,8 @@ def controlcode(steps: list, model_controls: CodeControls, show_tips: bool):
         steps = fix(steps, 'gcode', model_controls.controls)
         gcode_str = gcode(steps, model_controls.controls, show_tips)
 
-        gcode_str = gcode_str.split('\n')
+        # only the first 22 lines are needed as separate lines - the rest of the gcode is kept as one string
+        gcode_str = gcode_str.split('\n', 22)
         gcode_str = gcode_str[:15] + gcode_str[16:20] + gcode_str[22:]
         print('during 3mf generation, gcode lines for aux fan, purge and rise were deleted from the bamulab starting procedure')
         gcode_str = '\n'.join(gcode_str)
@@ -4,6 +4,10 @@ from lab.fullcontrol.controlcode_formats.controls import CodeControls
 from fullcontrol import transform as transform_original
 from typing import Union
 from lab.fullcontrol.laser.laser import Laser
+import re
+
+# Z and E terms (e.g. 'Z0.2 ' or 'E0.0123') are removed from gcode for laser cutters
+LASER_REMOVED_TERMS = re.compile(r'[ZE]\d*\.?\d+ ?', re.ASCII)
 
 
 def transform(steps: list, result_type: str, controls: Union[ModelControls, GcodeControls, CodeControls] = None, show_tips: bool = True):
@@ -25,12 +29,6 @@ def transform(steps: list, result_type: str, controls: Union[ModelControls, Gcod
             print("warning: no controls were supplied to fclab.transform(). it's advisable to supply fclab.ModelControls. the simulated extrusion width and height may be incorrect")
             geometry_model(steps, ModelControls())
     elif result_type == 'laser_cutter_gcode':
-        import re
-
-        def remove_terms_from_gcode(gcode, term_characters):
-            pattern = r'[' + ''.join(term_characters) + r']\d*\.?\d+ ?'
-            return re.sub(pattern, '', gcode)
-        
         if controls is None: controls = GcodeControls()
 
         # don't allow the gcode function to save gcode since we will modify it after generation
@@ -46,7 +44,7 @@ def transform(steps: list, result_type: str, controls: Union[ModelControls, Gcod
             if steps[0].constant_power == None and steps[0].dynamic_power == None:
                 raise Exception("first object in design (fclab.Laser) must have either 'constant_power' or 'dynamic_power' set")
         gcode = transform_original(steps, 'gcode', controls, show_tips)
-        gcode = remove_terms_from_gcode(gcode, ['Z', 'E'])
+        gcode = LASER_REMOVED_TERMS.sub('', gcode)
         # remove relative extrusion gcode command
         gcode = gcode.replace("M83 ; relative extrusion\n", "")
         return gcode